@@ -1,7 +1,18 @@
+import io
 import os
+import csv
 import json
+import time
 import psycopg
+from psycopg import sql
 from typing import Dict, Any
+from datetime import datetime
+
+# Экспорт/импорт сообщений через COPY
+EXPORT_CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+EXPORT_PAGE_SIZE = 1000
+EXPORT_MAX_PAGE_SIZE = 5000
+IMPORT_CHUNK_SIZE = 64 * 1024
 
 def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     '''
@@ -148,7 +159,92 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
                             'body': json.dumps({'messages': messages})
                         }
-                
+
+                    elif action == 'export_messages':
+                        query_params = event.get('queryStringParameters', {})
+                        chat_id = query_params.get('chatId')
+                        export_format = query_params.get('format', 'ndjson')
+
+                        if not chat_id or export_format not in EXPORT_CONTENT_TYPES:
+                            return {
+                                'statusCode': 400,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'Chat ID and format (ndjson or csv) required'})
+                            }
+
+                        try:
+                            chat_id = int(chat_id)
+                            after_id = int(query_params.get('afterId', 0))
+                            limit = max(1, min(int(query_params.get('limit', EXPORT_PAGE_SIZE)), EXPORT_MAX_PAGE_SIZE))
+                            date_from = datetime.fromisoformat(query_params['from']) if query_params.get('from') else None
+                            date_to = datetime.fromisoformat(query_params['to']) if query_params.get('to') else None
+                        except ValueError:
+                            return {
+                                'statusCode': 400,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'chatId, afterId and limit must be integers, from and to must be ISO dates'})
+                            }
+
+                        # Keyset-пагинация по id: каждая страница читает не больше limit строк
+                        conditions = [
+                            sql.SQL('chat_id = {}').format(sql.Literal(chat_id)),
+                            sql.SQL('id > {}').format(sql.Literal(after_id))
+                        ]
+                        if date_from:
+                            conditions.append(sql.SQL('created_at >= {}').format(sql.Literal(date_from)))
+                        if date_to:
+                            conditions.append(sql.SQL('created_at < {}').format(sql.Literal(date_to)))
+
+                        page_query = sql.SQL("""
+                            SELECT id, chat_id, user_id, message_text, created_at
+                            FROM messages
+                            WHERE {}
+                            ORDER BY id
+                            LIMIT {}
+                        """).format(sql.SQL(' AND ').join(conditions), sql.Literal(limit))
+
+                        if export_format == 'csv':
+                            copy_query = sql.SQL("COPY ({}) TO STDOUT WITH (FORMAT csv, HEADER true)").format(page_query)
+                        else:
+                            # JSON не содержит управляющих символов, поэтому CSV с \x01/\x02 отдаёт строки без экранирования
+                            copy_query = sql.SQL(
+                                "COPY (SELECT row_to_json(t) FROM ({}) t) TO STDOUT WITH (FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02')"
+                            ).format(page_query)
+
+                        # COPY читается блоками в буфер: страница целиком собирается в памяти, её размер ограничен limit
+                        buffer = io.BytesIO()
+                        started = time.perf_counter()
+                        with cur.copy(copy_query) as copy:
+                            for block in copy:
+                                buffer.write(block)
+                        elapsed = time.perf_counter() - started
+                        exported = cur.rowcount
+                        body = buffer.getvalue().decode('utf-8')
+
+                        # Курсор следующей страницы — id последней выгруженной строки
+                        next_after_id = None
+                        if exported == limit:
+                            if export_format == 'csv':
+                                last_row = None
+                                for last_row in csv.reader(io.StringIO(body)):
+                                    pass
+                                next_after_id = int(last_row[0])
+                            else:
+                                next_after_id = json.loads(body.rstrip('\n').rsplit('\n', 1)[-1])['id']
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {
+                                'Content-Type': EXPORT_CONTENT_TYPES[export_format],
+                                'Access-Control-Allow-Origin': '*',
+                                'Access-Control-Expose-Headers': 'X-Rows, X-Rows-Per-Second, X-Next-After-Id',
+                                'X-Rows': str(exported),
+                                'X-Rows-Per-Second': str(round(exported / elapsed) if elapsed > 0 else exported),
+                                'X-Next-After-Id': str(next_after_id) if next_after_id is not None else ''
+                            },
+                            'body': body
+                        }
+
                 elif method == 'POST':
                     body_data = json.loads(event.get('body', '{}'))
                     admin_id = body_data.get('adminId')
@@ -170,7 +266,84 @@ def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                             'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
                             'body': json.dumps({'error': 'Access denied'})
                         }
-                    
+
+                    if action == 'import_messages':
+                        import_format = body_data.get('format', 'ndjson')
+                        data = body_data.get('data', '')
+                        override_chat_id = body_data.get('chatId')
+
+                        if import_format not in EXPORT_CONTENT_TYPES or not data:
+                            return {
+                                'statusCode': 400,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'Format (ndjson or csv) and data required'})
+                            }
+
+                        # Промежуточная таблица повторяет колонки экспорта, чтобы выгрузку можно было загрузить обратно
+                        cur.execute("""
+                            CREATE TEMP TABLE messages_import (
+                                id INTEGER,
+                                chat_id INTEGER,
+                                user_id INTEGER,
+                                message_text TEXT,
+                                created_at TIMESTAMP
+                            ) ON COMMIT DROP
+                        """)
+
+                        started = time.perf_counter()
+                        if import_format == 'csv':
+                            with cur.copy("COPY messages_import (id, chat_id, user_id, message_text, created_at) FROM STDIN WITH (FORMAT csv, HEADER true)") as copy:
+                                for offset in range(0, len(data), IMPORT_CHUNK_SIZE):
+                                    copy.write(data[offset:offset + IMPORT_CHUNK_SIZE])
+                        else:
+                            with cur.copy("COPY messages_import (id, chat_id, user_id, message_text, created_at) FROM STDIN") as copy:
+                                for line in data.splitlines():
+                                    if not line.strip():
+                                        continue
+                                    row = json.loads(line)
+                                    copy.write_row((
+                                        row.get('id'),
+                                        row.get('chat_id'),
+                                        row.get('user_id'),
+                                        row.get('message_text'),
+                                        row.get('created_at')
+                                    ))
+                        staged = cur.rowcount
+
+                        # Слияние: пропускаем строки с несуществующими чатами/пользователями и уже загруженные сообщения
+                        cur.execute("""
+                            INSERT INTO messages (chat_id, user_id, message_text, created_at, updated_at)
+                            SELECT DISTINCT s.chat_id, s.user_id, s.message_text, s.created_at, s.created_at
+                            FROM (
+                                SELECT COALESCE(%s::integer, chat_id) AS chat_id, user_id, message_text,
+                                       COALESCE(created_at, CURRENT_TIMESTAMP) AS created_at
+                                FROM messages_import
+                                WHERE message_text IS NOT NULL
+                            ) s
+                            JOIN chats c ON c.id = s.chat_id
+                            JOIN users u ON u.id = s.user_id
+                            LEFT JOIN messages m ON m.chat_id = s.chat_id
+                                AND m.user_id = s.user_id
+                                AND m.created_at = s.created_at
+                                AND m.message_text = s.message_text
+                            WHERE m.id IS NULL
+                        """, (override_chat_id,))
+                        imported = cur.rowcount
+                        conn.commit()
+                        elapsed = time.perf_counter() - started
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({
+                                'success': True,
+                                'staged': staged,
+                                'imported': imported,
+                                'skipped': staged - imported,
+                                'rowsPerSecond': round(staged / elapsed) if elapsed > 0 else staged
+                            })
+                        }
+
                     target_user_id = body_data.get('userId')
                     if not target_user_id:
                         return {
@@ -0,0 +1,325 @@
+import os
+import json
+import time
+import bisect
+import psycopg
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+# LRU-кэш списков друзей в тёплом контейнере: user_id -> (время загрузки, отсортированные id друзей)
+FRIENDS_CACHE: 'OrderedDict[int, Tuple[float, List[int]]]' = OrderedDict()
+FRIENDS_CACHE_TTL = 60
+FRIENDS_CACHE_MAX_ENTRIES = 1000
+FRIENDS_PAGE_SIZE = 50
+FRIENDS_MAX_PAGE_SIZE = 200
+
+def get_friend_ids(cur: Any, user_id: int) -> List[int]:
+    '''Возвращает отсортированные id принятых друзей пользователя, используя кэш контейнера'''
+    cached = FRIENDS_CACHE.get(user_id)
+    if cached:
+        if time.monotonic() - cached[0] < FRIENDS_CACHE_TTL:
+            FRIENDS_CACHE.move_to_end(user_id)
+            return cached[1]
+        del FRIENDS_CACHE[user_id]
+
+    cur.execute(
+        "SELECT friend_id FROM friends WHERE user_id = %s AND status = 'accepted' ORDER BY friend_id",
+        (user_id,)
+    )
+    friend_ids = [row[0] for row in cur.fetchall()]
+    FRIENDS_CACHE[user_id] = (time.monotonic(), friend_ids)
+    while len(FRIENDS_CACHE) > FRIENDS_CACHE_MAX_ENTRIES:
+        FRIENDS_CACHE.popitem(last=False)
+    return friend_ids
+
+def invalidate_friends(*user_ids: int) -> None:
+    '''Сбрасывает кэш друзей для пользователей, чьи связи изменились'''
+    for user_id in user_ids:
+        FRIENDS_CACHE.pop(user_id, None)
+
+def fetch_users(cur: Any, user_ids: List[int]) -> List[Dict[str, Any]]:
+    '''Загружает публичные данные пользователей одной выборкой, сохраняя порядок user_ids'''
+    if not user_ids:
+        return []
+
+    cur.execute(
+        "SELECT id, username, him_id, is_premium, is_verified, avatar_url FROM users WHERE id = ANY(%s)",
+        (user_ids,)
+    )
+    users = {}
+    for row in cur.fetchall():
+        users[row[0]] = {
+            'id': row[0],
+            'username': row[1],
+            'himId': row[2],
+            'isPremium': row[3],
+            'isVerified': row[4],
+            'avatarUrl': row[5]
+        }
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+def paginate(ids: List[int], after_id: int, limit: int) -> Tuple[List[int], Optional[int]]:
+    '''Keyset-пагинация по отсортированному списку id'''
+    start = bisect.bisect_right(ids, after_id)
+    page = ids[start:start + limit]
+    next_after_id = page[-1] if len(page) == limit else None
+    return page, next_after_id
+
+def handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    '''
+    Business: Друзья пользователей: заявки, подтверждение, списки и общие друзья
+    Args: event - dict с httpMethod, body, queryStringParameters
+          context - объект с атрибутами: request_id, function_name, function_version, memory_limit_in_mb
+    Returns: HTTP response dict
+    '''
+    method: str = event.get('httpMethod', 'GET')
+
+    # Обработка CORS OPTIONS запроса
+    if method == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': {
+                'Access-Control-Allow-Origin': '*',
+                'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+                'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+                'Access-Control-Max-Age': '86400'
+            },
+            'body': ''
+        }
+
+    database_url = os.environ.get('DATABASE_URL')
+    if not database_url:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': 'Database connection not configured'})
+        }
+
+    try:
+        with psycopg.connect(database_url) as conn:
+            with conn.cursor() as cur:
+
+                if method == 'GET':
+                    query_params = event.get('queryStringParameters', {})
+                    user_id = query_params.get('userId')
+                    action = query_params.get('action', 'list')
+
+                    if not user_id:
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'User ID required'})
+                        }
+
+                    user_id = int(user_id)
+                    after_id = int(query_params.get('afterId', 0))
+                    limit = max(1, min(int(query_params.get('limit', FRIENDS_PAGE_SIZE)), FRIENDS_MAX_PAGE_SIZE))
+
+                    if action == 'list':
+                        # Список друзей страницами по id
+                        friend_ids = get_friend_ids(cur, user_id)
+                        page, next_after_id = paginate(friend_ids, after_id, limit)
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({
+                                'friends': fetch_users(cur, page),
+                                'total': len(friend_ids),
+                                'nextAfterId': next_after_id
+                            })
+                        }
+
+                    elif action == 'requests':
+                        # Входящие заявки: поиск по обратному индексу (friend_id, status)
+                        cur.execute("""
+                            SELECT user_id FROM friends
+                            WHERE friend_id = %s AND status = 'pending' AND user_id > %s
+                            ORDER BY user_id
+                            LIMIT %s
+                        """, (user_id, after_id, limit))
+
+                        requester_ids = [row[0] for row in cur.fetchall()]
+                        next_after_id = requester_ids[-1] if len(requester_ids) == limit else None
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({
+                                'requests': fetch_users(cur, requester_ids),
+                                'nextAfterId': next_after_id
+                            })
+                        }
+
+                    elif action == 'mutual':
+                        other_user_id = query_params.get('otherUserId')
+                        if not other_user_id:
+                            return {
+                                'statusCode': 400,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'Other user ID required'})
+                            }
+
+                        # Пересечение двух закэшированных списков вместо JOIN по всей таблице
+                        other_friend_ids = set(get_friend_ids(cur, int(other_user_id)))
+                        mutual_ids = [friend_id for friend_id in get_friend_ids(cur, user_id) if friend_id in other_friend_ids]
+                        page, next_after_id = paginate(mutual_ids, after_id, limit)
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({
+                                'mutual': fetch_users(cur, page),
+                                'count': len(mutual_ids),
+                                'nextAfterId': next_after_id
+                            })
+                        }
+
+                    elif action == 'check':
+                        ids_param = query_params.get('ids', '')
+                        check_ids = [int(item) for item in ids_param.split(',') if item.strip()]
+                        if not check_ids:
+                            return {
+                                'statusCode': 400,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'User IDs required'})
+                            }
+
+                        # Массовая проверка дружбы по одному загруженному списку
+                        friend_ids = set(get_friend_ids(cur, user_id))
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'friends': {str(check_id): check_id in friend_ids for check_id in check_ids}})
+                        }
+
+                elif method == 'POST':
+                    body_data = json.loads(event.get('body', '{}'))
+                    action = body_data.get('action')
+                    user_id = body_data.get('userId')
+                    friend_id = body_data.get('friendId')
+
+                    if not user_id or not friend_id:
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'User ID and friend ID required'})
+                        }
+
+                    user_id = int(user_id)
+                    friend_id = int(friend_id)
+                    if user_id == friend_id:
+                        return {
+                            'statusCode': 400,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'error': 'Cannot add yourself as a friend'})
+                        }
+
+                    # Блокировка пары пользователей до конца транзакции: встречные заявки обрабатываются по очереди
+                    cur.execute("SELECT pg_advisory_xact_lock(%s, %s)", (min(user_id, friend_id), max(user_id, friend_id)))
+
+                    if action == 'request':
+                        cur.execute("SELECT 1 FROM users WHERE id = %s AND is_banned = FALSE", (friend_id,))
+                        if not cur.fetchone():
+                            return {
+                                'statusCode': 404,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'User not found'})
+                            }
+
+                        # Заявка уже отправлена или пользователи уже друзья
+                        cur.execute("SELECT status FROM friends WHERE user_id = %s AND friend_id = %s", (user_id, friend_id))
+                        existing = cur.fetchone()
+                        if existing:
+                            return {
+                                'statusCode': 200,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'success': True, 'status': existing[0]})
+                            }
+
+                        # Встречная заявка уже есть — сразу подтверждаем дружбу
+                        cur.execute("""
+                            UPDATE friends SET status = 'accepted'
+                            WHERE user_id = %s AND friend_id = %s AND status = 'pending'
+                            RETURNING id
+                        """, (friend_id, user_id))
+
+                        if cur.fetchone():
+                            cur.execute("""
+                                INSERT INTO friends (user_id, friend_id, status)
+                                VALUES (%s, %s, 'accepted')
+                                ON CONFLICT (user_id, friend_id) DO UPDATE SET status = 'accepted'
+                            """, (user_id, friend_id))
+                            conn.commit()
+                            invalidate_friends(user_id, friend_id)
+
+                            return {
+                                'statusCode': 200,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'success': True, 'status': 'accepted'})
+                            }
+
+                        cur.execute("""
+                            INSERT INTO friends (user_id, friend_id, status)
+                            VALUES (%s, %s, 'pending')
+                        """, (user_id, friend_id))
+                        conn.commit()
+
+                        return {
+                            'statusCode': 201,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'success': True, 'status': 'pending'})
+                        }
+
+                    elif action == 'accept':
+                        # Повторное подтверждение уже принятой дружбы не считается ошибкой
+                        cur.execute("SELECT status FROM friends WHERE user_id = %s AND friend_id = %s", (user_id, friend_id))
+                        existing = cur.fetchone()
+                        if existing and existing[0] == 'accepted':
+                            return {
+                                'statusCode': 200,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'success': True, 'status': 'accepted'})
+                            }
+
+                        # Дружба хранится в обе стороны, чтобы списки читались по user_id
+                        cur.execute("""
+                            UPDATE friends SET status = 'accepted'
+                            WHERE user_id = %s AND friend_id = %s AND status = 'pending'
+                            RETURNING id
+                        """, (friend_id, user_id))
+
+                        if not cur.fetchone():
+                            return {
+                                'statusCode': 404,
+                                'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                                'body': json.dumps({'error': 'Friend request not found'})
+                            }
+
+                        cur.execute("""
+                            INSERT INTO friends (user_id, friend_id, status)
+                            VALUES (%s, %s, 'accepted')
+                            ON CONFLICT (user_id, friend_id) DO UPDATE SET status = 'accepted'
+                        """, (user_id, friend_id))
+                        conn.commit()
+                        invalidate_friends(user_id, friend_id)
+
+                        return {
+                            'statusCode': 200,
+                            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                            'body': json.dumps({'success': True, 'status': 'accepted'})
+                        }
+
+                return {
+                    'statusCode': 405,
+                    'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+                    'body': json.dumps({'error': 'Method not allowed'})
+                }
+
+    except Exception as e:
+        return {
+            'statusCode': 500,
+            'headers': {'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            'body': json.dumps({'error': f'Server error: {str(e)}'})
+        }
@@ -0,0 +1,3 @@
+CREATE INDEX idx_friends_friend_id_status ON friends (friend_id, status);
+
+CREATE INDEX idx_friends_user_id_status_friend_id ON friends (user_id, status, friend_id);
\ No newline at end of file
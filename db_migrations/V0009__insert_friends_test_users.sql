@@ -0,0 +1,4 @@
+INSERT INTO users (username, password_hash, him_id, him_coins, created_at) VALUES
+('Anna', 'anna', 'HIM001', 100, CURRENT_TIMESTAMP),
+('Boris', 'boris', 'HIM002', 100, CURRENT_TIMESTAMP),
+('Vera', 'vera', 'HIM003', 100, CURRENT_TIMESTAMP);
\ No newline at end of file